@@ -0,0 +1,69 @@
+"""
+secret_cache.py — Opt-in on-disk cache of KV v2 reads, validated by version.
+
+Enabled only when VAULT_CACHED is set to a true value such as 1 (and not
+bypassed with --no-cache). A cached read is reused for up to CACHE_FOR_S
+seconds, and only after a metadata request (no secret data) confirms its
+version is still the live one, so a changed or deleted secret is always
+fetched again.
+
+Entries live in ~/.cache/vault-poc/secrets/<sha256>.json, mode 0600 like the
+secret itself; the name hashes the address, token and path, so one token
+never sees another token's cached data.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vault-poc", "secrets")
+CACHE_FOR_S = 300
+
+
+def enabled() -> bool:
+    # Parsed, not just tested for presence: VAULT_CACHED=0 must not write secrets to disk.
+    return os.getenv("VAULT_CACHED", "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def _file(addr: str, token: str, path: str) -> str:
+    key = hashlib.sha256(f"{addr}\0{token}\0{path}".encode()).hexdigest()
+    return os.path.join(CACHE_DIR, key + ".json")
+
+
+def load(addr: str, token: str, path: str) -> Optional[dict]:
+    """Return the cached ``{"version", "fetched_at", "read"}`` entry if still within CACHE_FOR_S."""
+    try:
+        with open(_file(addr, token, path)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry.get("fetched_at", 0) > CACHE_FOR_S:
+        return None
+    return entry
+
+
+def is_current(entry: dict, metadata: dict) -> bool:
+    """True if ``metadata`` (from read_secret_metadata) still describes the cached version."""
+    data = metadata["data"]
+    if data["current_version"] != entry["version"]:
+        return False
+    version = data.get("versions", {}).get(str(entry["version"]), {})
+    return not version.get("deletion_time") and not version.get("destroyed")
+
+
+def store(addr: str, token: str, path: str, read: dict) -> None:
+    # Keep only what the reader prints; drop lease/request ids and the like.
+    read = {"data": {"data": read["data"]["data"], "metadata": read["data"]["metadata"]}}
+    entry = {"version": read["data"]["metadata"]["version"], "fetched_at": time.time(), "read": read}
+    target = _file(addr, token, path)
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, target)
+    except OSError:
+        pass  # the cache is an optimisation only
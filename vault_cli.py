@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+vault_cli.py — Read and append/merge dictionary secrets on Vault KV v2.
+
+reader.py and writer.py are thin wrappers around the ``read`` and ``write``
+subcommands. hvac (with requests under it) and python-dotenv are only imported
+once a subcommand actually runs, so ``--help`` and argument errors return
+immediately.
+
+Usage:
+  export VAULT_ADDR=http://127.0.0.1:8200
+  export VAULT_TOKEN=root
+  python vault_cli.py read --path=api-credentials [--id=myuser] [--reveal] [--stream]
+  python vault_cli.py write --path=api-credentials --id=myuser --api-secret XYZ [--overwrite]
+  python vault_cli.py write --path=api-credentials --ids-file=credentials.json [--create-only]
+
+Recommended for production: run a local Vault Agent (auto-auth + caching) and
+  export VAULT_AGENT_ADDR=http://127.0.0.1:8100
+It takes precedence over VAULT_ADDR and VAULT_TOKEN becomes optional: requests
+go over loopback to the agent, which adds the token and keeps the connection
+to Vault (DNS, TLS, auth) warm.
+
+Set VAULT_CACHED=1 to let ``read`` reuse recent results from an on-disk cache
+(see secret_cache.py); ``--no-cache`` bypasses it for one run.
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import time
+from typing import Optional
+
+from vault_env import get_env
+
+hvac = None  # imported by _load_hvac() once a subcommand runs
+orjson = None  # optional, faster JSON encoding; imported by cmd_read()
+
+MAX_WORKERS = 8  # concurrent reads; stays below vault_daemon.POOL_MAXSIZE
+MAX_RETRIES = 5
+RETRY_SLEEP_S = 0.25  # backoff base
+RETRY_SLEEP_MAX_S = 2.0  # backoff cap
+
+
+def _load_hvac() -> None:
+    global hvac
+    if hvac is None:
+        try:
+            import hvac as _hvac
+        except ImportError as exc:
+            raise SystemExit("Missing dependency: hvac. Install via 'pip install hvac python-dotenv'") from exc
+        hvac = _hvac
+
+
+def _client(vault_addr: str, token: str):
+    """Return a KV handle: the matching daemon if one is listening, else a direct client.
+
+    There is no up-front ``is_authenticated()`` check: a bad token makes the
+    first KV call fail with 403, which callers report via ``_permission_denied``.
+    That holds through the daemon too, since it is only used when it was
+    started with this same address and token.
+    """
+    _load_hvac()
+    import vault_daemon
+
+    kv = vault_daemon.connect(vault_addr, token)
+    if kv is None:
+        # No daemon running for this address and token: talk to Vault directly.
+        kv = vault_daemon.make_client(vault_addr, token).secrets.kv.v2
+    return kv
+
+
+def _permission_denied(action: str, path: str) -> None:
+    sys.stderr.write(f"Error: permission denied {action} '{path}'; check VAULT_TOKEN.\n")
+    sys.exit(1)
+
+
+# ---- read
+
+def _number(obj):
+    """``default`` hook for dumps(): --stream (ijson) yields non-integer numbers as Decimal."""
+    from decimal import Decimal
+
+    if isinstance(obj, Decimal):
+        return float(obj)  # what json.loads gives the non-streaming reader
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_number)
+        except orjson.JSONEncodeError:
+            pass  # e.g. an integer wider than 64 bits: json prints it exactly
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_number).encode()
+
+
+def _found(path: str, args: argparse.Namespace, entry: dict) -> dict:
+    """The line printed for a found ``--id``; it names the path when several were asked for."""
+    head = {"path": path, "id": args.id} if len(args.path) > 1 else {"id": args.id}
+    if args.reveal:
+        return {**head, **entry}  # Danger: prints secrets!
+    return {**head, "api_secret": "***"}
+
+
+def show(path: str, read: Optional[dict], args: argparse.Namespace, out: io.BytesIO) -> None:
+    """Render one path's result into ``out``; nothing reaches stdout until the end."""
+    if read is None:
+        out.write(f"(empty) No secret at path '{path}'.\n".encode())
+        return
+
+    data = read["data"]["data"] or {}
+    version = read["data"]["metadata"]["version"]
+
+    if args.id:
+        entry = data.get(args.id)
+        if entry is None:
+            out.write(f"id='{args.id}' not found at '{path}' (version {version}).\n".encode())
+            return
+        out.write(dumps(_found(path, args, entry)))
+        out.write(b"\n")
+        return
+
+    # Print summary of all IDs, one JSON object per line
+    out.write(f"Path '{path}' (version {version}) contains {len(data)} id(s):\n".encode())
+    write = out.write
+    if args.reveal:
+        # Danger: prints secrets!
+        for i, v in sorted(data.items()):
+            write(dumps({"id": i, **v}))
+            write(b"\n")
+    else:
+        for i in sorted(data):
+            write(dumps({"id": i, "api_secret": "***"}))
+            write(b"\n")
+
+
+def stream_path(client, path: str, args: argparse.Namespace) -> None:
+    """Print one path's entries while the response is parsed, never holding the dict.
+
+    Entries come out in the order Vault sends them (not sorted), and the
+    version is not known up front, so the summary line comes last.
+    """
+    import ijson
+
+    # JSONAdapter would parse the whole body; the raw adapter hands back the response.
+    adapter = hvac.adapters.RawAdapter.from_adapter(client.adapter)
+    api_path = hvac.utils.format_url("/v1/{mount_point}/data/{path}", mount_point="secret", path=path)
+    out = sys.stdout.buffer
+    try:
+        resp = adapter.get(api_path, stream=True)
+    except hvac.exceptions.InvalidPath:
+        out.write(f"(empty) No secret at path '{path}'.\n".encode())
+        return
+    except hvac.exceptions.Forbidden:
+        _permission_denied("reading", path)
+
+    count = 0
+    with resp:
+        resp.raw.decode_content = True
+        try:
+            entries = ijson.kvitems(resp.raw, "data.data")
+            if args.id:
+                for i, v in entries:
+                    if i == args.id:
+                        out.write(dumps(_found(path, args, v)))
+                        out.write(b"\n")
+                        count = 1
+                        break  # found it: no need to read the rest of the body
+            else:
+                for i, v in entries:
+                    count += 1
+                    if args.reveal:
+                        # Danger: prints secrets!
+                        out.write(dumps({"id": i, **v}))
+                    else:
+                        out.write(dumps({"id": i, "api_secret": "***"}))
+                    out.write(b"\n")
+        except ijson.JSONError as err:
+            out.flush()
+            sys.stderr.write(f"Error: cannot parse the secret at '{path}': {err}\n")
+            sys.exit(1)
+    if args.id and not count:
+        out.write(f"id='{args.id}' not found at '{path}'.\n".encode())
+    elif not args.id:
+        out.write(f"Path '{path}' streamed {count} id(s).\n".encode())
+    out.flush()
+
+
+def cmd_read(args: argparse.Namespace) -> None:
+    global orjson
+    try:
+        import orjson
+    except ImportError:
+        pass  # dumps() falls back to the json module
+    vault_addr, token = get_env()
+
+    if args.stream:
+        try:
+            import ijson  # noqa: F401
+        except ImportError as exc:
+            raise SystemExit("Missing dependency for --stream: ijson. Install via 'pip install ijson'") from exc
+        # Streaming needs the raw HTTP response, so it always talks to Vault
+        # directly instead of going through the daemon.
+        _load_hvac()
+        import vault_daemon
+
+        client = vault_daemon.make_client(vault_addr, token)
+        for path in args.path:
+            stream_path(client, path, args)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    import secret_cache
+
+    kv = _client(vault_addr, token)
+    read_secret = kv.read_secret_version
+    use_cache = not args.no_cache and secret_cache.enabled()
+
+    def cached_read(path: str) -> dict:
+        # A cache hit costs one small metadata request instead of the full secret.
+        entry = secret_cache.load(vault_addr, token, path)
+        if entry is not None:
+            try:
+                metadata = kv.read_secret_metadata(path=path)
+            except hvac.exceptions.Forbidden:
+                metadata = None  # data readable but metadata not: just read it in full
+            if metadata is not None and secret_cache.is_current(entry, metadata):
+                return entry["read"]
+        read = read_secret(path=path)
+        secret_cache.store(vault_addr, token, path, read)
+        return read
+
+    def read_path(path: str) -> Optional[dict]:
+        try:
+            return cached_read(path) if use_cache else read_secret(path=path)
+        except hvac.exceptions.InvalidPath:
+            return None
+        except hvac.exceptions.Forbidden:
+            _permission_denied("reading", path)
+
+    # Fetch every path at once over the shared connection pool, so the wall
+    # time is that of the slowest read rather than the sum of all of them.
+    with ThreadPoolExecutor(max_workers=min(len(args.path), MAX_WORKERS)) as pool:
+        reads = list(pool.map(read_path, args.path))
+
+    # Build the whole report in memory and hand it to stdout in one write.
+    out = io.BytesIO()
+    for path, read in zip(args.path, reads):
+        show(path, read, args, out)
+    sys.stdout.buffer.write(out.getvalue())
+
+
+# ---- write
+
+def load_entries(ids_file: str) -> dict:
+    """Load an ``id -> {"api_secret": ...}`` mapping from a JSON file."""
+    try:
+        with open(ids_file) as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as err:
+        sys.stderr.write(f"Error: cannot read --ids-file '{ids_file}': {err}\n")
+        sys.exit(1)
+    if not entries or not isinstance(entries, dict) or not all(isinstance(v, dict) for v in entries.values()):
+        sys.stderr.write(f"Error: --ids-file '{ids_file}' must map each id to an object.\n")
+        sys.exit(1)
+    return entries
+
+
+def cas_version(kv, path: str) -> int:
+    """Return the version to CAS against, from the (data-free) metadata endpoint.
+
+    A path whose latest version was deleted has no readable data but still has
+    a non-zero version, so "no data" does not mean ``cas=0``.
+    """
+    try:
+        return kv.read_secret_metadata(path=path)["data"]["current_version"]
+    except (hvac.exceptions.InvalidPath, hvac.exceptions.Forbidden):
+        return 0  # secret doesn't exist yet (or metadata is not readable: assume so)
+
+
+def _error_text(err: Exception) -> str:
+    return " ".join(err.errors) if getattr(err, "errors", None) else str(err)
+
+
+def _is_cas_conflict(text: str) -> bool:
+    # Vault reports a stale cas as a 400 with this phrase (not a 412)
+    return "check-and-set parameter did not match" in text.lower()
+
+
+def cmd_write(args: argparse.Namespace) -> None:
+    if args.ids_file is not None:
+        entries = load_entries(args.ids_file)
+        label = f"{len(entries)} id(s) from '{args.ids_file}'"
+    else:
+        entries = {args.id: {"api_secret": args.api_secret}}
+        label = f"id='{args.id}'"
+
+    vault_addr, token = get_env()
+    kv = _client(vault_addr, token)
+    path = args.path
+    # Bound once: on DaemonKV each attribute lookup builds a new forwarding callable.
+    read_secret = kv.read_secret_version
+    write_secret = kv.create_or_update_secret
+
+    def report(written: dict) -> None:
+        version = written["data"]["version"]
+        sys.stdout.write(f"Upsert OK: {label} written at '{path}' (version {version}).\n")
+
+    if args.create_only:
+        # Expect a brand-new path: skip the read and create it with cas=0. If it
+        # already exists Vault refuses on CAS and we fall through to the normal
+        # read-merge loop below, with all of its attempts still available.
+        try:
+            written = write_secret(path=path, secret=entries, cas=0)
+        except hvac.exceptions.Forbidden:
+            _permission_denied("writing", path)
+        except hvac.exceptions.VaultError as err:
+            msg = _error_text(err)
+            if not _is_cas_conflict(msg):
+                sys.stderr.write(f"Failed to write: {msg}\n")
+                sys.exit(3)
+        else:
+            report(written)
+            return
+
+    # Retry loop to handle CAS conflicts (simultaneous writers)
+    sleep_s = RETRY_SLEEP_S
+    for attempt in range(1, MAX_RETRIES + 1):
+        # True when cas=0 is our assumption rather than a version Vault gave us;
+        # a conflict then just means the guess was wrong, not that others write.
+        guessed = False
+
+        # 1) Read current secret and version
+        current_data = {}
+        current_version = 0
+        try:
+            read = read_secret(path=path)
+            current_data = read["data"]["data"] or {}
+            current_version = read["data"]["metadata"]["version"]
+        except hvac.exceptions.InvalidPath:
+            # No live data -> treat as empty dict. Assume a new secret (cas=0)
+            # first; after a conflict (or a failed --create-only probe) ask the
+            # metadata for the real version.
+            current_data = {}
+            guessed = attempt == 1 and not args.create_only  # the probe already tried cas=0
+            current_version = 0 if guessed else cas_version(kv, path)
+        except hvac.exceptions.Forbidden:
+            _permission_denied("reading", path)
+
+        # 2) Check overwrite policy
+        existing = [] if args.overwrite else sorted(i for i in entries if i in current_data)
+        if existing:
+            ids = "', '".join(existing)
+            if len(existing) == 1:
+                msg = f"Refused: id '{ids}' already exists. Use --overwrite to replace it.\n"
+            else:
+                msg = f"Refused: id(s) '{ids}' already exist. Use --overwrite to replace them.\n"
+            sys.stderr.write(msg)
+            sys.exit(2)
+
+        # 3) Merge new entries in place: each attempt re-reads a fresh dict,
+        # so there is no need to copy it first. A given id's entry is
+        # replaced as a whole (with --overwrite, its old fields are dropped).
+        current_data.update(entries)
+        new_data = current_data
+
+        # 4) Write. A CAS conflict sends us back to step 1 for a full read: the
+        # merged new_data cannot simply be retried against the newer version,
+        # as that would drop whatever the other writer just added.
+        try:
+            # Write back with CAS to avoid lost updates:
+            # - If secret exists, set cas=<current_version>
+            # - If it doesn't exist, cas=0 to create only if missing
+            written = write_secret(path=path, secret=new_data, cas=current_version)
+            report(written)
+            return
+        except hvac.exceptions.Forbidden:
+            _permission_denied("writing", path)
+        except hvac.exceptions.VaultError as err:
+            msg = _error_text(err)
+            if _is_cas_conflict(msg) and attempt < MAX_RETRIES:
+                if not guessed:  # a wrong cas=0 guess is not contention: retry at once
+                    # Decorrelated jitter: random waits keep colliding writers
+                    # from retrying in lockstep and conflicting again.
+                    sleep_s = min(RETRY_SLEEP_MAX_S, random.uniform(RETRY_SLEEP_S, sleep_s * 3))
+                    time.sleep(sleep_s)
+                continue
+            # Other errors or retries exhausted
+            sys.stderr.write(f"Failed to write (attempt {attempt}/{MAX_RETRIES}): {msg}\n")
+            sys.exit(3)
+
+
+def main(argv: Optional[list[str]] = None, prog: Optional[str] = None) -> None:
+    """Run the CLI; ``prog`` names the subcommand in usage (for reader.py / writer.py)."""
+    parser = argparse.ArgumentParser(description="Read and write dictionary secrets on Vault KV v2.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    read = commands.add_parser("read", prog=prog, help="Read a dictionary secret.",
+                               description="Read a dictionary secret from Vault KV v2.")
+    read.add_argument("--path", nargs="+", default=["api-credentials"],
+                      help="Path(s) under KV v2; several paths are fetched concurrently.")
+    read.add_argument("--id", help="Optional id to print only that entry.")
+    read.add_argument("--reveal", action="store_true",
+                      help="Print secrets in clear text (use with caution).")
+    read.add_argument("--no-cache", action="store_true",
+                      help="Ignore the VAULT_CACHED on-disk cache for this run.")
+    read.add_argument("--stream", action="store_true",
+                      help="Print entries while the response is parsed, in constant memory "
+                           "(unsorted; for very large secrets; needs ijson).")
+    read.set_defaults(func=cmd_read)
+
+    write = commands.add_parser("write", prog=prog, help="Append/merge credentials into a dictionary secret.",
+                                description="Append/merge credentials into a Vault KV v2 dictionary.")
+    write.add_argument("--path", default="api-credentials",
+                       help="Relative path under KV v2 (default: api-credentials).")
+    source = write.add_mutually_exclusive_group(required=True)
+    source.add_argument("--id", help="Logical ID (dictionary key).")
+    source.add_argument("--ids-file",
+                        help="JSON file mapping id -> {\"api_secret\": ...}; all ids are written at once.")
+    write.add_argument("--api-secret", help="API secret for --id (will NOT be printed).")
+    write.add_argument("--overwrite", action="store_true",
+                       help="Allow overwriting existing id entries (each is replaced as a whole).")
+    write.add_argument("--create-only", action="store_true",
+                       help="Expect a new path: create it without reading first "
+                            "(falls back to the normal merge if it already exists).")
+    write.set_defaults(func=cmd_write)
+
+    args = parser.parse_args(argv)
+    if args.command == "write" and args.id is not None and args.api_secret is None:
+        write.error("--api-secret is required with --id")
+    if args.command == "write" and args.ids_file == "":
+        write.error("--ids-file needs a file name")
+    if args.command == "write" and args.ids_file is not None and args.api_secret is not None:
+        write.error("--api-secret cannot be used with --ids-file (put secrets in the file)")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+vault_daemon.py — Keep one pooled Vault client alive for vault_cli.py.
+
+Every CLI run otherwise builds a fresh hvac.Client and pays a new TCP (and TLS)
+handshake per secret operation. The daemon holds a single hvac.Client backed by
+a keep-alive requests.Session and serves KV v2 calls over a Unix domain socket.
+reader.py and writer.py use the socket when it is there, owned by the same user,
+and the daemon serves the same VAULT_ADDR and VAULT_TOKEN; otherwise they fall
+back to a direct client.
+
+Usage:
+  export VAULT_ADDR=http://127.0.0.1:8200
+  export VAULT_TOKEN=root
+  python vault_daemon.py &                    # listens on $VAULT_DAEMON_SOCKET
+  python reader.py --path=api-credentials     # now served through the daemon
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+from typing import Optional
+
+try:
+    import hvac
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError as exc:
+    raise SystemExit("Missing dependency: hvac. Install via 'pip install hvac python-dotenv'") from exc
+
+from vault_env import get_env
+
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+# A daemon that accepts but never answers must not hang the CLI: connect and
+# "hello" get a short timeout, KV calls one above hvac's own 30 s request timeout.
+HELLO_TIMEOUT_S = 1.0
+CALL_TIMEOUT_S = 60.0
+
+# KV v2 methods the daemon is willing to run on behalf of a client.
+OPS = ("read_secret_version", "read_secret_metadata", "create_or_update_secret")
+
+
+def socket_path() -> str:
+    explicit = os.getenv("VAULT_DAEMON_SOCKET")
+    if explicit:
+        return explicit
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")  # per-user and 0700 where systemd provides it
+    if runtime_dir:
+        return os.path.join(runtime_dir, "vault-poc.sock")
+    # Otherwise a 0700 directory of our own, never a guessable name in bare /tmp.
+    return os.path.join(tempfile.gettempdir(), f"vault-poc-{os.getuid()}", "daemon.sock")
+
+
+def identity(addr: str, token: str) -> str:
+    """Fingerprint of the Vault server and token a daemon acts for."""
+    return hashlib.sha256(f"{addr}\0{token}".encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def make_client(addr: str, token: str) -> "hvac.Client":
+    """Build (once per process) an hvac client whose session keeps connections alive."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # An empty token (Vault Agent injects it) must stay empty: passing None would
+    # make hvac fall back to VAULT_TOKEN / ~/.vault-token on its own.
+    return hvac.Client(url=addr, token=token or "", session=session)
+
+
+class DaemonKV:
+    """Stand-in for ``client.secrets.kv.v2`` that forwards calls to the daemon.
+
+    Vault errors raised inside the daemon are re-raised here as the same
+    ``hvac.exceptions`` class, so callers handle both paths identically.
+    Each thread gets its own connection, so one handle can be shared by a
+    thread pool.
+    """
+
+    def __init__(self, sock_path: str):
+        self._sock_path = sock_path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Anyone can bind a socket at a path they can write to; only talk to
+            # one our own user created, or secrets would go to someone else's server.
+            st = os.lstat(self._sock_path)
+            if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+                raise PermissionError(f"{self._sock_path} is not a socket owned by this user")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(HELLO_TIMEOUT_S)
+            try:
+                sock.connect(self._sock_path)
+            except OSError:
+                sock.close()
+                raise
+            sock.settimeout(CALL_TIMEOUT_S)
+            self._local.sock = sock
+            conn = self._local.conn = sock.makefile("rwb")
+        return conn
+
+    def hello(self) -> str:
+        """Ask the daemon whom it serves, giving up after HELLO_TIMEOUT_S."""
+        self._conn()
+        sock = self._local.sock
+        sock.settimeout(HELLO_TIMEOUT_S)
+        try:
+            return self._call("hello")
+        finally:
+            sock.settimeout(CALL_TIMEOUT_S)
+
+    def _call(self, op: str, **kwargs):
+        conn = self._conn()
+        conn.write(json.dumps({"op": op, "kwargs": kwargs}).encode() + b"\n")
+        conn.flush()
+        line = conn.readline()
+        if not line:
+            raise hvac.exceptions.VaultDown("vault daemon closed the connection")
+        resp = json.loads(line)
+        if resp["ok"]:
+            return resp["result"]
+        error_cls = getattr(hvac.exceptions, resp["error"], hvac.exceptions.VaultError)
+        raise error_cls(resp["message"], errors=resp["errors"])
+
+    def __getattr__(self, op: str):
+        if op not in OPS:
+            raise AttributeError(op)
+        return functools.partial(self._call, op)
+
+
+def connect(addr: str, token: str) -> Optional[DaemonKV]:
+    """Return a daemon-backed KV handle, or None if no suitable daemon is listening.
+
+    A daemon started for another server or token is not used: every call
+    through it would run with its token, not the caller's.
+    """
+    kv = DaemonKV(socket_path())
+    try:
+        if kv.hello() != identity(addr, token):
+            return None
+    except (OSError, hvac.exceptions.VaultError):
+        return None  # no daemon, not ours, hung (timed out), or too old to answer "hello"
+    return kv
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        kv = self.server.kv
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+                op = req["op"]
+                if op == "hello":
+                    self.wfile.write(json.dumps({"ok": True, "result": self.server.identity}).encode() + b"\n")
+                    continue
+                if op not in OPS:
+                    raise hvac.exceptions.InvalidRequest(f"unsupported op '{op}'")
+                result = getattr(kv, op)(**req.get("kwargs", {}))
+                # Non-200 replies come back from hvac as Response objects; nothing to forward.
+                resp = {"ok": True, "result": result if isinstance(result, dict) else None}
+            except hvac.exceptions.VaultError as err:
+                resp = {
+                    "ok": False,
+                    "error": type(err).__name__,
+                    "message": err.args[0] if err.args else None,
+                    "errors": err.errors,
+                }
+            except requests.RequestException as err:
+                # Vault unreachable: report it rather than let the thread die.
+                resp = {"ok": False, "error": "VaultDown", "message": str(err), "errors": None}
+            except (ValueError, KeyError, TypeError) as err:
+                resp = {"ok": False, "error": "InvalidRequest", "message": str(err), "errors": None}
+            self.wfile.write(json.dumps(resp).encode() + b"\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve Vault KV v2 calls over a Unix socket.")
+    parser.add_argument("--socket", default=socket_path(),
+                        help="Unix socket path (default: $VAULT_DAEMON_SOCKET, else a per-user "
+                             "runtime or temp directory).")
+    args = parser.parse_args()
+
+    vault_addr, token = get_env()
+    client = make_client(vault_addr, token)
+    if not client.is_authenticated():
+        sys.stderr.write("Error: failed to authenticate with Vault; check VAULT_TOKEN.\n")
+        sys.exit(1)
+
+    sock_dir = os.path.dirname(os.path.abspath(args.socket))
+    os.makedirs(sock_dir, mode=0o700, exist_ok=True)
+    if args.socket == socket_path() and os.stat(sock_dir).st_uid != os.getuid():
+        sys.stderr.write(f"Error: {sock_dir} is owned by another user; refusing to use it.\n")
+        sys.exit(1)
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)  # stale socket from a previous run
+    old_umask = os.umask(0o177)  # the socket carries our token's privileges: owner only
+    try:
+        server = socketserver.ThreadingUnixStreamServer(args.socket, _Handler)
+    finally:
+        os.umask(old_umask)
+    server.kv = client.secrets.kv.v2
+    server.identity = identity(vault_addr, token)
+    server.daemon_threads = True
+    print(f"Vault daemon for {vault_addr} listening on {args.socket}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
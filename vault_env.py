@@ -0,0 +1,35 @@
+"""
+vault_env.py — Where to reach Vault: address and token from the environment.
+
+Shared by vault_cli.py and vault_daemon.py so that neither imports the other
+for it. Standard library only (python-dotenv is optional).
+"""
+
+import os
+import sys
+
+
+def get_env() -> tuple[str, str]:
+    """Return ``(address, token)``; a local Vault Agent wins over VAULT_ADDR.
+
+    With VAULT_AGENT_ADDR set, the agent authenticates and injects the token
+    itself, so VAULT_TOKEN is optional and the token may be empty.
+    """
+    # Only parse .env when the environment does not already provide what we need;
+    # python-dotenv is optional and imported only then.
+    if not (os.getenv("VAULT_AGENT_ADDR") or (os.getenv("VAULT_ADDR") and os.getenv("VAULT_TOKEN"))):
+        try:
+            from dotenv import load_dotenv
+        except ImportError:
+            pass
+        else:
+            load_dotenv()
+    agent_addr = os.getenv("VAULT_AGENT_ADDR")
+    if agent_addr:
+        return agent_addr, os.getenv("VAULT_TOKEN", "")
+    addr = os.getenv("VAULT_ADDR")
+    token = os.getenv("VAULT_TOKEN")
+    if not addr or not token:
+        sys.stderr.write("Error: VAULT_ADDR and VAULT_TOKEN (or VAULT_AGENT_ADDR) must be set.\n")
+        sys.exit(1)
+    return addr, token